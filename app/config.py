@@ -1,5 +1,5 @@
 # app/config.py
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 import os
 
@@ -11,13 +11,19 @@ class Settings(BaseSettings):
 
     # Model settings
     MODEL_PATH: str = "app/models/model.pkl"
+    # is_fraud = fraud_probability > FRAUD_THRESHOLD (strict); probabilitas tepat
+    # sama dengan threshold = bukan fraud, konsisten dengan argmax model.predict
+    FRAUD_THRESHOLD: float = 0.5
+    PRELOAD_MODELS: bool = False
+
+    # Batching settings
+    BATCH_MAX_SIZE: int = 64
+    BATCH_MAX_WAIT_MS: float = 2.0
 
     # API settings
     API_V1_PREFIX: str = "/api/v1"
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 @lru_cache()
 def get_settings():
@@ -19,28 +19,25 @@ logger = logging.getLogger(__name__)
 model_loader = None
 fraud_service = None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
+# ✅ FIX: Load models dengan encoder paths
+models_config = {
+    "online-payment": {
+        "model_path": "app/models/ml_models/online_payment.pkl",
+        "encoder_path": "app/models/ml_models/online_payment_label_encoder.pkl"  # Encoder online payment existing
+    },
+    "credit-card": {
+        "model_path": "app/models/ml_models/credit_card.pkl", 
+        "encoder_path": "app/models/ml_models/credit_card_label_encoders.pkl"  # File yang Anda buat
+    }
+}
+
+def load_models():
+    """Load semua model dan inisialisasi fraud service"""
     global model_loader, fraud_service
     
-    logger.info("🚀 Starting Multi-Model Fraud Detection API...")
-    
     # Initialize model loader
     model_loader = MultiModelLoader() 
     
-    # ✅ FIX: Load models dengan encoder paths
-    models_config = {
-        "online-payment": {
-            "model_path": "app/models/ml_models/online_payment.pkl",
-            "encoder_path": "app/models/ml_models/online_payment_label_encoder.pkl"  # Encoder online payment existing
-        },
-        "credit-card": {
-            "model_path": "app/models/ml_models/credit_card.pkl", 
-            "encoder_path": "app/models/ml_models/credit_card_label_encoders.pkl"  # File yang Anda buat
-        }
-    }
-    
     loaded_models = []
     for model_name, config in models_config.items():
         success = model_loader.load_model(
@@ -61,11 +58,27 @@ async def lifespan(app: FastAPI):
     else:
         logger.error("❌ No models loaded, service unavailable")
         fraud_service = None
+
+# Preload saat import: dengan `gunicorn --preload` model dimuat sekali di proses
+# parent lalu dibagi ke semua worker lewat fork (copy-on-write)
+if settings.PRELOAD_MODELS:
+    logger.info("📦 Preloading models at import time...")
+    load_models()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    logger.info("🚀 Starting Multi-Model Fraud Detection API...")
+    
+    if model_loader is None:
+        load_models()
     
     yield
     
     # Shutdown
     logger.info("🔄 Shutting down Multi-Model Fraud Detection API...")
+    if fraud_service:
+        await fraud_service.close()
 
 app = FastAPI(
     title="Multi-Model Fraud Detection API",
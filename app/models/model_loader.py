@@ -6,13 +6,44 @@ from typing import Any, Optional, Dict
 import logging
 import numpy as np
 
+from app.models import protocol5
+from app.models.onnx_model import OnnxModel, ONNX_AVAILABLE
+from app.utils.preprocessing import (
+    CC_CATEGORICAL_FEATURES, ONLINE_PAYMENT_TYPE_FALLBACK,
+    build_online_payment_type_map, clear_preprocess_cache
+)
+
 logger = logging.getLogger(__name__)
 
+def _has_memmap(obj, _seen=None) -> bool:
+    """Cek apakah ada np.memmap di dalam model (atribut, list, dict, sub-estimator)"""
+    if isinstance(obj, np.memmap):
+        return True
+    _seen = _seen if _seen is not None else set()
+    if id(obj) in _seen:
+        return False
+    _seen.add(id(obj))
+    if isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    elif hasattr(obj, '__dict__') and not isinstance(obj, np.ndarray):
+        children = vars(obj).values()
+    else:
+        return False
+    return any(_has_memmap(child, _seen) for child in children)
+
 class MultiModelLoader:
     def __init__(self):
         self.models: Dict[str, Any] = {}
         self.label_encoders: Dict[str, Any] = {}
         self.loaded_models: Dict[str, bool] = {}
+        self.n_features: Dict[str, Optional[int]] = {}
+        # Cache classes_ credit card encoders untuk encoding tanpa transform()
+        self._cc_classes: Dict[str, np.ndarray] = {}
+        self._cc_class_set: Dict[str, frozenset] = {}
+        # Mapping type -> kode online payment, tanpa LabelEncoder.transform()
+        self._op_type_map: Dict[str, int] = dict(ONLINE_PAYMENT_TYPE_FALLBACK)
     
     def load_model(self, model_name: str, model_path: str, encoder_path: str = None) -> bool:
         """Load ML model dan label encoder untuk model tertentu"""
@@ -23,14 +54,32 @@ class MultiModelLoader:
                 logger.error(f"Model file not found: {model_path}")
                 return False
             
-            # Load model
-            try:
-                self.models[model_name] = joblib.load(model_path)
-                logger.info(f"✅ {model_name} model loaded with joblib")
-            except:
-                with open(model_path, 'rb') as f:
-                    self.models[model_name] = pickle.load(f)
-                logger.info(f"✅ {model_name} model loaded with pickle")
+            # Prioritaskan ONNX (scripts/convert_to_onnx.py) jika onnxruntime tersedia
+            onnx_path = model_file.with_suffix('.onnx')
+            bpk_path = model_file.with_suffix('.bpk')
+            model = None
+            if ONNX_AVAILABLE and onnx_path.exists():
+                try:
+                    model = OnnxModel(str(onnx_path))
+                    logger.info(f"✅ {model_name} model loaded with onnxruntime")
+                except Exception as e:
+                    logger.warning(f"Failed to load {onnx_path}, falling back: {e}")
+            if model is None and bpk_path.exists():
+                # Pickle protocol 5 (scripts/repickle_protocol5.py), buffers di-mmap
+                try:
+                    model = protocol5.load(bpk_path)
+                    logger.info(f"✅ {model_name} model loaded with pickle protocol 5 (mmap buffers)")
+                except Exception as e:
+                    logger.warning(f"Failed to load {bpk_path}, falling back to {model_path}: {e}")
+            if model is None:
+                model = self._load_sklearn_model(model_name, model_path)
+            self.models[model_name] = model
+            
+            # Hindari joblib worker di dalam event loop saat predict per request
+            if hasattr(self.models[model_name], 'n_jobs'):
+                self.models[model_name].n_jobs = 1
+            
+            self.n_features[model_name] = getattr(self.models[model_name], 'n_features_in_', None)
             
             # Load label encoder berdasarkan model type
             if encoder_path and Path(encoder_path).exists():
@@ -44,6 +93,17 @@ class MultiModelLoader:
                 logger.warning(f"Label encoder not found for {model_name}: {encoder_path}")
                 self.label_encoders[model_name] = None
             
+            if model_name == "online-payment":
+                self._op_type_map = build_online_payment_type_map(self.label_encoders[model_name])
+            
+            if model_name == "credit-card":
+                self._build_cc_fast_encoders(self.label_encoders[model_name])
+                missing = [f for f in CC_CATEGORICAL_FEATURES if f not in self._cc_classes]
+                if missing:
+                    logger.error(f"❌ {model_name} missing label encoders for {missing}, model not available")
+                    self.loaded_models[model_name] = False
+                    return False
+            
             self.loaded_models[model_name] = True
             return True
             
@@ -52,33 +112,74 @@ class MultiModelLoader:
             self.loaded_models[model_name] = False
             return False
     
+    def _load_sklearn_model(self, model_name: str, model_path: str):
+        """Load model sklearn dari .pkl"""
+        # mmap_mode hanya menghasilkan np.memmap untuk file joblib.dump tanpa kompresi;
+        # file pickle biasa (seperti .pkl yang ada sekarang) tetap di-load ke heap.
+        # Tree sklearn juga menyalin node/value arrays di __setstate__, jadi
+        # RandomForest tidak berbagi page cache walaupun di-dump dengan joblib.
+        try:
+            model = joblib.load(model_path, mmap_mode='r')
+            if _has_memmap(model):
+                logger.info(f"✅ {model_name} model loaded with joblib (mmap)")
+            else:
+                logger.info(f"✅ {model_name} model loaded with joblib (no memmap arrays)")
+        except Exception:
+            try:
+                model = joblib.load(model_path)
+                logger.info(f"✅ {model_name} model loaded with joblib")
+            except:
+                with open(model_path, 'rb') as f:
+                    model = pickle.load(f)
+                logger.info(f"✅ {model_name} model loaded with pickle")
+        return model
+    
     def get_model(self, model_name: str):
         """Get specific model"""
         if model_name not in self.loaded_models or not self.loaded_models[model_name]:
             raise ValueError(f"Model {model_name} not loaded")
         return self.models[model_name]
     
+    def get_n_features(self, model_name: str) -> Optional[int]:
+        """Get jumlah fitur yang diharapkan model (di-cache saat load)"""
+        return self.n_features.get(model_name)
+    
     def get_label_encoders(self, model_name: str):
         """Get label encoders untuk model tertentu"""
         return self.label_encoders.get(model_name)
     
+    def _build_cc_fast_encoders(self, label_encoders):
+        """Precompute classes_ (sorted) dan set untuk tiap credit card encoder"""
+        clear_preprocess_cache()
+        self._cc_classes = {}
+        self._cc_class_set = {}
+        if not isinstance(label_encoders, dict):
+            return
+        for feature, encoder in label_encoders.items():
+            if hasattr(encoder, 'classes_'):
+                self._cc_classes[feature] = np.asarray(encoder.classes_)
+                self._cc_class_set[feature] = frozenset(encoder.classes_.tolist())
+    
+    def get_op_type_map(self) -> Dict[str, int]:
+        """Get mapping type -> kode untuk online payment"""
+        return self._op_type_map
+    
+    def get_cc_fast_encoders(self):
+        """Get (classes, class_set) untuk credit card encoders"""
+        return self._cc_classes, self._cc_class_set
+    
     def predict(self, model_name: str, features):
         """Make prediction using specific model"""
         model = self.get_model(model_name)
         prediction = model.predict(features)
-        
-        if isinstance(prediction, np.ndarray):
-            return [item.item() if isinstance(item, np.number) else item for item in prediction]
-        return prediction
+        return prediction.tolist() if isinstance(prediction, np.ndarray) else prediction
     
     def predict_proba(self, model_name: str, features):
         """Get prediction probabilities"""
         model = self.get_model(model_name)
         if hasattr(model, 'predict_proba'):
             probabilities = model.predict_proba(features)
-            if isinstance(probabilities, np.ndarray):
-                return probabilities.tolist()
-            return probabilities
+            return probabilities.tolist() if isinstance(probabilities, np.ndarray) else probabilities
         return None
     
     def is_model_loaded(self, model_name: str) -> bool:
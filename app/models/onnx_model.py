@@ -0,0 +1,32 @@
+# app/models/onnx_model.py
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # onnxruntime opsional, fallback ke model sklearn .pkl
+    ort = None
+
+ONNX_AVAILABLE = ort is not None
+
+class OnnxModel:
+    """Wrapper ONNX Runtime dengan interface predict/predict_proba seperti sklearn"""
+
+    def __init__(self, model_path: str):
+        if ort is None:
+            raise ImportError("onnxruntime is not installed")
+        self.session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        n_features = model_input.shape[1]
+        self.n_features_in_ = n_features if isinstance(n_features, int) else None
+
+    def _run(self, features):
+        X = np.asarray(features, dtype=np.float32)
+        return self.session.run(None, {self.input_name: X})
+
+    def predict(self, features):
+        return self._run(features)[0]
+
+    def predict_proba(self, features):
+        # Output kedua = probabilitas (model dikonversi dengan zipmap=False)
+        return self._run(features)[1]
@@ -0,0 +1,55 @@
+# app/models/protocol5.py
+"""
+Format .bpk: pickle protocol 5 dengan out-of-band buffers.
+
+- <name>.bpk      : pickle berisi (layout, payload), layout = [(offset, size), ...]
+- <name>.bpk.buf  : semua buffer numpy berurutan, tiap buffer di-align 64 byte
+
+Saat load, file .buf di-mmap read-only dan diberikan ke pickle.loads sebagai
+buffers. Array numpy yang di-unpickle langsung (mis. coefs_ MLP credit card)
+menjadi view ke mmap (zero-copy). Tree sklearn (RandomForest online payment)
+menyalin node/value arrays di __setstate__, jadi buffer-nya tetap dibaca lalu
+disalin ke heap di setiap worker.
+"""
+import mmap
+import pickle
+from pathlib import Path
+from typing import Any
+
+ALIGNMENT = 64
+
+def buffer_path(path: Path) -> Path:
+    return path.with_name(path.name + '.buf')
+
+def dump(obj: Any, path: Path):
+    """Simpan object ke .bpk + .bpk.buf"""
+    buffers = []
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+    layout = []
+    offset = 0
+    with open(buffer_path(path), 'wb') as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(raw)
+            layout.append((offset, raw.nbytes))
+            offset += raw.nbytes
+
+    with open(path, 'wb') as f:
+        pickle.dump((layout, payload), f, protocol=5)
+
+def load(path: Path) -> Any:
+    """Load object dari .bpk dengan buffers di-mmap dari .bpk.buf"""
+    with open(path, 'rb') as f:
+        layout, payload = pickle.load(f)
+
+    if not layout:
+        return pickle.loads(payload)
+
+    with open(buffer_path(path), 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    return pickle.loads(payload, buffers=[view[offset:offset + size] for offset, size in layout])
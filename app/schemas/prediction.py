@@ -1,19 +1,26 @@
 # app/schemas/prediction.py
-from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing import Optional, Dict, Literal, Annotated
+
+TransactionType = Literal['PAYMENT', 'TRANSFER', 'CASH_OUT', 'DEBIT', 'CASH_IN']
+NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
 # Online Payment Schema
 class OnlinePaymentInput(BaseModel):
-    step: int = Field(..., description="Transaction step/time")
-    type: str = Field(..., description="Transaction type (PAYMENT, TRANSFER, CASH_OUT, DEBIT, CASH_IN)")
-    amount: float = Field(..., description="Transaction amount")
-    oldbalanceOrg: float = Field(..., description="Sender's balance before transaction")
-    newbalanceOrig: float = Field(..., description="Sender's balance after transaction")
-    oldbalanceDest: float = Field(..., description="Receiver's balance before transaction")
-    newbalanceDest: float = Field(..., description="Receiver's balance after transaction")
+    step: int = Field(..., ge=0, description="Transaction step/time")
+    type: TransactionType = Field(..., description="Transaction type (PAYMENT, TRANSFER, CASH_OUT, DEBIT, CASH_IN)")
+    amount: float = Field(..., ge=0, description="Transaction amount")
+    oldbalanceOrg: float = Field(..., ge=0, description="Sender's balance before transaction")
+    newbalanceOrig: float = Field(..., ge=0, description="Sender's balance after transaction")
+    oldbalanceDest: float = Field(..., ge=0, description="Receiver's balance before transaction")
+    newbalanceDest: float = Field(..., ge=0, description="Receiver's balance after transaction")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='forbid',
+        frozen=True,
+        str_strip_whitespace=True,
+        allow_inf_nan=False,
+        json_schema_extra={
             "example": {
                 "step": 1,
                 "type": "PAYMENT",
@@ -24,23 +31,28 @@ class OnlinePaymentInput(BaseModel):
                 "newbalanceDest": 0.0
             }
         }
+    )
 
 # Credit Card Schema
 class CreditCardInput(BaseModel):
-    merchant: str = Field(..., description="Merchant name")
-    category: str = Field(..., description="Transaction category")
-    amt: float = Field(..., description="Transaction amount")
-    city: str = Field(..., description="City where transaction occurred")
-    state: str = Field(..., description="State where transaction occurred")
+    merchant: NonEmptyStr = Field(..., description="Merchant name")
+    category: NonEmptyStr = Field(..., description="Transaction category")
+    amt: float = Field(..., gt=0, description="Transaction amount")
+    city: NonEmptyStr = Field(..., description="City where transaction occurred")
+    state: NonEmptyStr = Field(..., description="State where transaction occurred")
     lat: float = Field(..., description="Latitude of transaction")
     long: float = Field(..., description="Longitude of transaction")
     city_pop: int = Field(..., description="City population")
-    job: str = Field(..., description="Cardholder job")
+    job: NonEmptyStr = Field(..., description="Cardholder job")
     merch_lat: float = Field(..., description="Merchant latitude")
     merch_long: float = Field(..., description="Merchant longitude")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='forbid',
+        frozen=True,
+        str_strip_whitespace=True,
+        allow_inf_nan=False,
+        json_schema_extra={
             "example": {
                 "merchant": "fraud_Rippin, Kub and Mann",
                 "category": "misc_net",
@@ -55,6 +67,7 @@ class CreditCardInput(BaseModel):
                 "merch_long": -82.1661
             }
         }
+    )
 
 # Universal Response Schema
 class FraudDetectionResponse(BaseModel):
@@ -66,8 +79,11 @@ class FraudDetectionResponse(BaseModel):
     transaction_amount: float = Field(..., description="Transaction amount")
     features_used: dict = Field(..., description="Features used for prediction")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='forbid',
+        frozen=True,
+        protected_namespaces=(),
+        json_schema_extra={
             "example": {
                 "model_type": "credit-card",
                 "is_fraud": False,
@@ -81,6 +97,7 @@ class FraudDetectionResponse(BaseModel):
                 }
             }
         }
+    )
 
 # Health Response
 class HealthResponse(BaseModel):
@@ -88,8 +105,10 @@ class HealthResponse(BaseModel):
     models_loaded: Dict[str, bool] = Field(..., description="Status of loaded models")
     message: str = Field(..., description="Status message")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra='forbid',
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "models_loaded": {
@@ -99,3 +118,4 @@ class HealthResponse(BaseModel):
                 "message": "All services are healthy"
             }
         }
+    )
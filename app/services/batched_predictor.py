@@ -0,0 +1,107 @@
+# app/services/batched_predictor.py
+import asyncio
+import logging
+from typing import Any, List, Optional, Tuple
+
+import anyio
+import numpy as np
+
+from app.models.model_loader import MultiModelLoader
+
+logger = logging.getLogger(__name__)
+
+class BatchedPredictor:
+    """Gabungkan request yang datang berdekatan menjadi satu panggilan predict_proba"""
+
+    def __init__(self, model_loader: MultiModelLoader, model_name: str,
+                 max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.model_loader = model_loader
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, features) -> Optional[List[float]]:
+        """Kirim satu baris fitur (shape (1, n_features)), tunggu baris probabilitas hasil batch"""
+        loop = asyncio.get_running_loop()
+        # Worker dari event loop lain (mis. loop lama yang sudah ditutup) tidak pernah
+        # "done", jadi queue dan worker dibuat ulang per loop
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+
+        future = loop.create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    async def close(self):
+        """Stop background worker"""
+        if self._worker is not None and self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[Any, asyncio.Future]]:
+        """Ambil item pertama, lalu kumpulkan sampai MAX_BATCH atau MAX_WAIT habis"""
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _predict(self, X):
+        # predict_proba CPU-bound, jalankan di threadpool agar event loop tidak terblokir
+        return await anyio.to_thread.run_sync(self.model_loader.predict_proba, self.model_name, X)
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            batch = await self._collect(queue)
+
+            try:
+                X = np.vstack([features for features, _ in batch])
+                probabilities = await self._predict(X)
+            except Exception as e:
+                if len(batch) == 1:
+                    self._set_exception(batch[0][1], e)
+                    continue
+                # Ulangi per baris supaya hanya request yang bermasalah yang gagal
+                logger.warning(f"Batched prediction error for {self.model_name}, retrying per row: {e}")
+                for features, future in batch:
+                    try:
+                        row = await self._predict(features)
+                    except Exception as row_error:
+                        self._set_exception(future, row_error)
+                        continue
+                    self._set_result(future, row[0] if row is not None else None)
+                continue
+
+            for i, (_, future) in enumerate(batch):
+                self._set_result(future, probabilities[i] if probabilities is not None else None)
+
+    def _set_result(self, future: asyncio.Future, result):
+        if not future.done():
+            future.set_result(result)
+
+    def _set_exception(self, future: asyncio.Future, error: Exception):
+        logger.error(f"Prediction error for {self.model_name}: {error}")
+        if not future.done():
+            future.set_exception(error)
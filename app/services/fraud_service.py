@@ -1,61 +1,70 @@
 # app/services/fraud_service.py
+from app.config import settings
 from app.models.model_loader import MultiModelLoader  # ✅ FIX
+from app.services.batched_predictor import BatchedPredictor
 from app.utils.preprocessing import (
-    preprocess_online_payment_data, validate_online_payment_data, get_online_payment_feature_names,  # ✅ FIX function names
-    preprocess_credit_card_data, validate_credit_card_data, get_credit_card_feature_names
+    preprocess_online_payment_data, ONLINE_PAYMENT_FEATURE_NAMES,
+    preprocess_credit_card_data, CREDIT_CARD_FEATURE_NAMES
 )
 from app.schemas.prediction import (
     OnlinePaymentInput, CreditCardInput, FraudDetectionResponse  # ✅ FIX: Gunakan OnlinePaymentInput
 )
 from fastapi import HTTPException
+import bisect
 import logging
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# (confidence_level, risk_score) per rentang probabilitas: <=0.4, (0.4, 0.8], >0.8.
+# Confidence menggambarkan keyakinan prediksi, jadi probabilitas rendah = confidence
+# "high" bahwa transaksi bukan fraud (risk LOW).
+_RISK_THRESHOLDS = (0.4, 0.8)
+_RISK_LEVELS = (("high", "LOW"), ("medium", "MEDIUM"), ("high", "HIGH"))
+
 class FraudDetectionService:
     def __init__(self, model_loader: MultiModelLoader):  # ✅ FIX: MultiModelLoader
         self.model_loader = model_loader
+        self.batchers = {
+            model_name: BatchedPredictor(
+                model_loader, model_name,
+                max_batch=settings.BATCH_MAX_SIZE,
+                max_wait_ms=settings.BATCH_MAX_WAIT_MS
+            )
+            for model_name in ("online-payment", "credit-card")
+        }
+    
+    async def close(self):
+        """Stop semua batch worker"""
+        for batcher in self.batchers.values():
+            await batcher.close()
     
     async def predict_online_payment_fraud(self, data: OnlinePaymentInput) -> FraudDetectionResponse:  # ✅ FIX
         """Prediksi fraud untuk online payment"""
         try:
-            if not validate_online_payment_data(data.dict()):  # ✅ FIX function name
-                raise HTTPException(status_code=400, detail="Invalid online payment data")
-            
-            # ✅ Get label encoder dari MultiModelLoader
-            label_encoder = self.model_loader.get_label_encoders("online-payment")
+            # ✅ Get precomputed type map dari MultiModelLoader
+            type_map = self.model_loader.get_op_type_map()
             
-            features = preprocess_online_payment_data(data.dict(), label_encoder)  # ✅ Pass encoder
-            feature_names = get_online_payment_feature_names()  # ✅ FIX function name
+            features, feature_values = preprocess_online_payment_data(data, type_map)
             
             # Validasi feature count
-            model = self.model_loader.get_model("online-payment")
-            expected_features = model.n_features_in_
+            expected_features = self.model_loader.get_n_features("online-payment")
             
-            if len(features) != expected_features:
-                raise ValueError(f"Feature count mismatch: generated {len(features)}, model expects {expected_features}")
+            if expected_features is not None and features.shape[1] != expected_features:
+                raise ValueError(f"Feature count mismatch: generated {features.shape[1]}, model expects {expected_features}")
             
-            # Prediksi
-            prediction = self.model_loader.predict("online-payment", [features])[0]
-            prediction = bool(prediction)
-            
-            # Probabilitas
-            probability = 0.0
-            probabilities = self.model_loader.predict_proba("online-payment", [features])
-            if probabilities is not None:
-                probability = float(probabilities[0][1])
+            # Probabilitas (batched), prediksi diturunkan dari threshold
+            probabilities = await self.batchers["online-payment"].submit(features)
+            if probabilities is None:
+                raise ValueError("online-payment model does not support predict_proba")
+            probability = float(probabilities[1])
+            # Strict '>': seri (mis. 50/100 tree) = bukan fraud, sama seperti argmax model.predict
+            prediction = probability > settings.FRAUD_THRESHOLD
             
             # Risk assessment
             confidence_level, risk_score = self._assess_risk(probability)
             
             # Feature dictionary
-            features_dict = {}
-            for name, value in zip(feature_names, features):
-                if isinstance(value, np.number):
-                    features_dict[name] = value.item()
-                else:
-                    features_dict[name] = value
+            features_dict = dict(zip(ONLINE_PAYMENT_FEATURE_NAMES, feature_values))
             
             return FraudDetectionResponse(
                 model_type="online-payment",
@@ -74,42 +83,30 @@ class FraudDetectionService:
     async def predict_credit_card_fraud(self, data: CreditCardInput) -> FraudDetectionResponse:
         """Prediksi fraud untuk credit card"""
         try:
-            if not validate_credit_card_data(data.dict()):
-                raise HTTPException(status_code=400, detail="Invalid credit card data")
-            
-            # ✅ Get label encoders dari MultiModelLoader
-            label_encoders = self.model_loader.get_label_encoders("credit-card")
+            # ✅ Get precomputed encoder classes dari MultiModelLoader
+            classes, class_set = self.model_loader.get_cc_fast_encoders()
             
-            features = preprocess_credit_card_data(data.dict(), label_encoders)  # ✅ Pass encoders
-            feature_names = get_credit_card_feature_names()
+            features, feature_values = preprocess_credit_card_data(data, classes, class_set)
             
             # Validasi feature count
-            model = self.model_loader.get_model("credit-card")
-            expected_features = model.n_features_in_
-            
-            if len(features) != expected_features:
-                raise ValueError(f"Feature count mismatch: generated {len(features)}, model expects {expected_features}")
+            expected_features = self.model_loader.get_n_features("credit-card")
             
-            # Prediksi
-            prediction = self.model_loader.predict("credit-card", [features])[0]
-            prediction = bool(prediction)
+            if expected_features is not None and features.shape[1] != expected_features:
+                raise ValueError(f"Feature count mismatch: generated {features.shape[1]}, model expects {expected_features}")
             
-            # Probabilitas
-            probability = 0.0
-            probabilities = self.model_loader.predict_proba("credit-card", [features])
-            if probabilities is not None:
-                probability = float(probabilities[0][1])
+            # Probabilitas (batched), prediksi diturunkan dari threshold
+            probabilities = await self.batchers["credit-card"].submit(features)
+            if probabilities is None:
+                raise ValueError("credit-card model does not support predict_proba")
+            probability = float(probabilities[1])
+            # Strict '>': seri (mis. 50/100 tree) = bukan fraud, sama seperti argmax model.predict
+            prediction = probability > settings.FRAUD_THRESHOLD
             
             # Risk assessment
             confidence_level, risk_score = self._assess_risk(probability)
             
             # Feature dictionary
-            features_dict = {}
-            for name, value in zip(feature_names, features):
-                if isinstance(value, np.number):
-                    features_dict[name] = value.item()
-                else:
-                    features_dict[name] = value
+            features_dict = dict(zip(CREDIT_CARD_FEATURE_NAMES, feature_values))
             
             return FraudDetectionResponse(
                 model_type="credit-card",
@@ -127,11 +124,4 @@ class FraudDetectionService:
     
     def _assess_risk(self, probability: float) -> tuple:
         """Risk assessment berdasarkan probabilitas"""
-        if probability > 0.8:
-            return "high", "HIGH"
-        elif probability > 0.6:
-            return "medium", "MEDIUM"
-        elif probability > 0.4:
-            return "medium", "MEDIUM"
-        else:
-            return "high", "LOW"
+        return _RISK_LEVELS[bisect.bisect_left(_RISK_THRESHOLDS, probability)]
@@ -1,156 +1,105 @@
 # app/utils/preprocessing.py
 import numpy as np
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 import joblib
 import os
 import logging
+from pydantic import ValidationError
+
+from app.schemas.prediction import OnlinePaymentInput, CreditCardInput
 
 logger = logging.getLogger(__name__)
 
 # ✅ Online Payment Preprocessing - Dengan Parameter Label Encoder
-def preprocess_online_payment_data(data: Dict, label_encoder: Any = None) -> List[float]:
-    """Preprocessing untuk online payment dengan label encoder dari pkl"""
-    
-    # Fallback mapping
-    fallback_mapping = {
-        'PAYMENT': 0, 'TRANSFER': 1, 'CASH_OUT': 2, 'DEBIT': 3, 'CASH_IN': 4
-    }
-    
-    try:
-        if label_encoder and hasattr(label_encoder, 'transform'):
-            # Gunakan sklearn LabelEncoder dari pkl
-            type_encoded = label_encoder.transform([data['type']])[0]
-        elif label_encoder and isinstance(label_encoder, dict):
-            # Gunakan dictionary mapping
-            type_encoded = label_encoder.get(data['type'], 0)
-        else:
-            # Fallback ke mapping default
-            type_encoded = fallback_mapping.get(data['type'], 0)
-            
-    except ValueError:
-        # Handle unknown transaction type
-        logger.warning(f"Unknown transaction type: {data['type']}, using fallback")
-        type_encoded = fallback_mapping.get(data['type'], 0)
-    except Exception as e:
-        logger.error(f"Error encoding transaction type: {e}")
-        type_encoded = fallback_mapping.get(data['type'], 0)
+ONLINE_PAYMENT_FEATURE_NAMES = ('step', 'amount', 'type_encoded', 'diffOrig', 'diffDest')
+
+# Fallback mapping
+ONLINE_PAYMENT_TYPE_FALLBACK = {
+    'PAYMENT': 0, 'TRANSFER': 1, 'CASH_OUT': 2, 'DEBIT': 3, 'CASH_IN': 4
+}
+
+def build_online_payment_type_map(label_encoder: Any = None) -> Dict[str, int]:
+    """Precompute dict type -> kode dari label encoder pkl (LabelEncoder atau dict)"""
+    type_map = dict(ONLINE_PAYMENT_TYPE_FALLBACK)
+    if label_encoder is not None and hasattr(label_encoder, 'classes_'):
+        # Gunakan sklearn LabelEncoder dari pkl
+        type_map.update({str(cls): int(i) for i, cls in enumerate(label_encoder.classes_)})
+    elif label_encoder and isinstance(label_encoder, dict):
+        # Gunakan dictionary mapping
+        type_map.update({str(cls): int(code) for cls, code in label_encoder.items()})
+    else:
+        logger.warning("Online payment label encoder not available, using fallback mapping")
+    return type_map
+
+def preprocess_online_payment_data(data: OnlinePaymentInput, type_map: Dict[str, int]) -> Tuple[np.ndarray, Tuple]:
+    """Preprocessing untuk online payment dengan type map dari label encoder pkl.
+    Return (array shape (1, 5) untuk model, tuple nilai asli untuk features_used)"""
+    type_encoded = type_map.get(data.type, 0)
     
     # Feature engineering
-    diffOrig = data['oldbalanceOrg'] - data['newbalanceOrig'] + data['amount']
-    diffDest = data['newbalanceDest'] - data['oldbalanceDest'] - data['amount']
+    diffOrig = data.oldbalanceOrg - data.newbalanceOrig + data.amount
+    diffDest = data.newbalanceDest - data.oldbalanceDest - data.amount
     
-    features = [
-        data['step'],
-        data['amount'],
-        int(type_encoded),
-        diffOrig,
-        diffDest
-    ]
+    values = (data.step, data.amount, type_encoded, diffOrig, diffDest)
+    features = np.empty((1, len(ONLINE_PAYMENT_FEATURE_NAMES)), dtype=np.float64)
+    features[0] = values
     
-    return features
+    return features, values
 
-def validate_online_payment_data(data: Dict) -> bool:  # ✅ Rename function
-    """Validasi untuk online payment"""
-    required_fields = ['step', 'type', 'amount', 'oldbalanceOrg', 
-                      'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest']
-    
-    for field in required_fields:
-        if field not in data:
-            return False
-    
-    valid_types = ['PAYMENT', 'TRANSFER', 'CASH_OUT', 'DEBIT', 'CASH_IN']
-    if data['type'] not in valid_types:
-        return False
-    
-    numeric_fields = ['step', 'amount', 'oldbalanceOrg', 'newbalanceOrig', 
-                     'oldbalanceDest', 'newbalanceDest']
-    
-    for field in numeric_fields:
-        if not isinstance(data[field], (int, float)) or data[field] < 0:
-            return False
-    
-    return True
+# ✅ Credit Card Preprocessing - Dengan classes_ dari PKL Encoders
+CC_NUMERICAL_FEATURES = ('amt', 'lat', 'long', 'city_pop', 'merch_lat', 'merch_long')
+CC_CATEGORICAL_FEATURES = ('merchant', 'category', 'city', 'state', 'job')
+CREDIT_CARD_FEATURE_NAMES = CC_NUMERICAL_FEATURES + tuple(f"{f}_encoded" for f in CC_CATEGORICAL_FEATURES)
 
-def get_online_payment_feature_names() -> List[str]:  # ✅ Rename function
-    """Feature names untuk online payment"""
-    return ['step', 'amount', 'type_encoded', 'diffOrig', 'diffDest']
+# Referensi encoders per id(classes), supaya id tetap unik selama cache hidup
+_cc_encoder_refs: Dict[int, Tuple[Dict, Dict]] = {}
 
-# ✅ Credit Card Preprocessing - Dengan Parameter Label Encoders PKL
-def preprocess_credit_card_data(data: Dict, label_encoders: Dict = None) -> List[float]:
-    """Preprocessing untuk credit card dengan label encoders pkl"""
-    features = []
-    
-    # Add numerical features first (6 features)
-    numerical_features = ['amt', 'lat', 'long', 'city_pop', 'merch_lat', 'merch_long']
-    for feature in numerical_features:
-        features.append(float(data[feature]))
-    
-    # Add encoded categorical features (5 features) - MENGGUNAKAN PKL ENCODERS
-    categorical_features = ['merchant', 'category', 'city', 'state', 'job']
-    
-    if label_encoders and isinstance(label_encoders, dict):
-        for feature in categorical_features:
-            if feature in label_encoders:
-                encoder = label_encoders[feature]
-                try:
-                    # Transform menggunakan fitted encoder dari pkl
-                    encoded_value = encoder.transform([str(data[feature])])[0]
-                    features.append(int(encoded_value))
-                    logger.debug(f"Encoded {feature}: '{data[feature]}' -> {encoded_value}")
-                    
-                except ValueError:
-                    # Handle unknown category
-                    logger.warning(f"Unknown value for {feature}: '{data[feature]}', using 0")
-                    features.append(0)
-                except Exception as e:
-                    logger.error(f"Error encoding {feature}: {e}")
-                    features.append(0)
-            else:
-                logger.warning(f"No encoder found for {feature}")
-                features.append(0)
-    else:
-        # Fallback ke hash-based encoding jika pkl encoders tidak tersedia
-        logger.warning("Label encoders not available, using hash-based fallback")
-        for feature in categorical_features:
-            try:
-                category_value = str(data[feature]).strip().lower()
-                encoded_value = abs(hash(category_value)) % 1000
-                features.append(encoded_value)
-            except Exception as e:
-                logger.warning(f"Error hash encoding {feature}: {e}")
-                features.append(0)
-    
-    return features
+@lru_cache(maxsize=16384)
+def _encode_cc_categoricals(merchant: str, category: str, city: str, state: str, job: str,
+                            encoders_id: int) -> Tuple[int, ...]:
+    """Encode 5 fitur kategorikal credit card, di-cache per tuple kategori"""
+    classes, class_set = _cc_encoder_refs[encoders_id]
+    encoded = []
+    for feature, value in zip(CC_CATEGORICAL_FEATURES, (merchant, category, city, state, job)):
+        if feature not in classes:
+            raise ValueError(f"No encoder found for {feature}")
+        if value in class_set[feature]:
+            encoded.append(int(np.searchsorted(classes[feature], value)))
+        else:
+            # Handle unknown category
+            logger.warning(f"Unknown value for {feature}: '{value}', using 0")
+            encoded.append(0)
+    return tuple(encoded)
 
-def validate_credit_card_data(data: Dict) -> bool:
-    """Validasi untuk credit card"""
-    required_fields = ['merchant', 'category', 'amt', 'city', 'state', 
-                      'lat', 'long', 'city_pop', 'job', 'merch_lat', 'merch_long']
-    
-    for field in required_fields:
-        if field not in data:
-            return False
-    
-    numeric_fields = ['amt', 'lat', 'long', 'city_pop', 'merch_lat', 'merch_long']
-    for field in numeric_fields:
-        if not isinstance(data[field], (int, float)):
-            return False
-    
-    if data['amt'] <= 0:
-        return False
-    
-    string_fields = ['merchant', 'category', 'city', 'state', 'job']
-    for field in string_fields:
-        if not isinstance(data[field], str) or not data[field].strip():
-            return False
-    
-    return True
+def clear_preprocess_cache():
+    """Reset cache encoding credit card (dipanggil saat encoders di-load ulang)"""
+    _encode_cc_categoricals.cache_clear()
+    _cc_encoder_refs.clear()
 
-def get_credit_card_feature_names() -> List[str]:
-    """Feature names untuk credit card"""
-    return ['amt', 'lat', 'long', 'city_pop', 'merch_lat', 'merch_long',
-            'merchant_encoded', 'category_encoded', 'city_encoded', 
-            'state_encoded', 'job_encoded']
+def preprocess_credit_card_data(data: CreditCardInput, classes: Dict = None,
+                                class_set: Dict = None) -> Tuple[np.ndarray, Tuple]:
+    """Preprocessing untuk credit card dengan classes_ encoders pkl.
+    Return (array shape (1, 11) untuk model, tuple nilai asli untuk features_used)"""
+    if not classes or not class_set:
+        raise ValueError("Credit card label encoders not available")
+    
+    # Numerical features first (6 features)
+    numerical = (float(data.amt), float(data.lat), float(data.long), float(data.city_pop),
+                 float(data.merch_lat), float(data.merch_long))
+    
+    # Encoded categorical features (5 features) - cached per tuple kategori
+    encoders_id = id(classes)
+    if encoders_id not in _cc_encoder_refs:
+        _cc_encoder_refs[encoders_id] = (classes, class_set)
+    encoded = _encode_cc_categoricals(data.merchant, data.category, data.city, data.state, data.job,
+                                      encoders_id)
+    
+    values = numerical + encoded
+    features = np.empty((1, len(CREDIT_CARD_FEATURE_NAMES)), dtype=np.float64)
+    features[0] = values
+    
+    return features, values
 
 # ✅ Keep legacy functions for backward compatibility
 def load_label_encoder():
@@ -159,19 +108,22 @@ def load_label_encoder():
     if os.path.exists(encoder_path):
         return joblib.load(encoder_path)
     else:
-        return {
-            'PAYMENT': 0, 'TRANSFER': 1, 'CASH_OUT': 2, 'DEBIT': 3, 'CASH_IN': 4
-        }
+        return dict(ONLINE_PAYMENT_TYPE_FALLBACK)
 
-def preprocess_transaction_data(data: Dict) -> List[float]:
+def preprocess_transaction_data(data: Dict) -> np.ndarray:
     """Legacy function - redirect to new function"""
-    le = load_label_encoder()
-    return preprocess_online_payment_data(data, le)
+    type_map = build_online_payment_type_map(load_label_encoder())
+    features, _ = preprocess_online_payment_data(OnlinePaymentInput(**data), type_map)
+    return features
 
 def get_feature_names():
-    """Legacy function - redirect to new function"""
-    return get_online_payment_feature_names()
+    """Legacy function - redirect to new constant"""
+    return list(ONLINE_PAYMENT_FEATURE_NAMES)
 
 def validate_transaction_data(data: Dict) -> bool:
-    """Legacy function - redirect to new function"""
-    return validate_online_payment_data(data)
+    """Legacy function - validasi lewat schema OnlinePaymentInput"""
+    try:
+        OnlinePaymentInput(**data)
+    except ValidationError:
+        return False
+    return True
@@ -0,0 +1,34 @@
+# scripts/convert_to_onnx.py
+"""
+Konversi model sklearn (.pkl) ke ONNX untuk inference dengan onnxruntime.
+
+Jalankan dari root project:
+    pip install skl2onnx onnxruntime
+    python scripts/convert_to_onnx.py
+
+File .onnx disimpan di samping .pkl; MultiModelLoader otomatis memakai .onnx
+jika file tersebut ada dan onnxruntime terpasang.
+"""
+from pathlib import Path
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+MODEL_DIR = Path("app/models/ml_models")
+MODELS = ["online_payment.pkl", "credit_card.pkl"]
+
+def convert(model_path: Path):
+    model = joblib.load(model_path)
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('input', FloatTensorType([None, model.n_features_in_]))],
+        options={id(model): {'zipmap': False}},
+    )
+    onnx_path = model_path.with_suffix('.onnx')
+    onnx_path.write_bytes(onnx_model.SerializeToString())
+    print(f"✅ {model_path} -> {onnx_path}")
+
+if __name__ == "__main__":
+    for name in MODELS:
+        convert(MODEL_DIR / name)
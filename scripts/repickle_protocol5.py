@@ -0,0 +1,28 @@
+# scripts/repickle_protocol5.py
+"""
+Dump ulang model .pkl ke format .bpk (pickle protocol 5 + out-of-band buffers).
+
+Jalankan dari root project:
+    python -m scripts.repickle_protocol5
+
+File .bpk dan .bpk.buf disimpan di samping .pkl; MultiModelLoader otomatis
+memakai .bpk jika file tersebut ada (kecuali ada .onnx yang diprioritaskan).
+"""
+from pathlib import Path
+
+import joblib
+
+from app.models import protocol5
+
+MODEL_DIR = Path("app/models/ml_models")
+MODELS = ["online_payment.pkl", "credit_card.pkl"]
+
+def repickle(model_path: Path):
+    model = joblib.load(model_path)
+    bpk_path = model_path.with_suffix('.bpk')
+    protocol5.dump(model, bpk_path)
+    print(f"✅ {model_path} -> {bpk_path}")
+
+if __name__ == "__main__":
+    for name in MODELS:
+        repickle(MODEL_DIR / name)